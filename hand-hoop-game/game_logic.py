@@ -2,6 +2,11 @@ import time
 from game_objects import Ball
 from utils import calculate_distance
 
+# Konfigurasi Lemparan
+THROW_GAIN = 4.5              # Pengali kecepatan lempar
+THROW_REFERENCE_FPS = 30      # FPS acuan agar kekuatan lemparan sama seperti versi per-frame
+THROW_VELOCITY_WINDOW = 0.1   # Jendela waktu (detik) untuk estimasi kecepatan
+
 def start_game(game_state):
     """Memulai sesi permainan baru dan mereset variabel."""
     game_state.score = 0
@@ -38,12 +43,16 @@ def spawn_ball(game_state):
         ball = Ball(x=0.7, y=game_state.ground)
         game_state.balls.append(ball)
 
-def update_game(game_state, sound_manager=None):
+def update_game(game_state, sound_manager=None, replay_buffer=None, frame_time=None):
     """
     Loop utama logika game: Fisika, interaksi tangan, dan scoring.
     Versi yang ditingkatkan untuk kemudahan lemparan.
+    `frame_time` adalah waktu frame diambil dari kamera; dipakai untuk riwayat
+    posisi tangan agar jitter waktu inferensi tidak ikut masuk estimasi lemparan.
     """
     now = time.time()
+    if frame_time is None:
+        frame_time = now
     
     # 1. Spawning Mechanics
     if now - game_state.last_spawn_time > 3 and len(game_state.balls) < 5:
@@ -61,6 +70,12 @@ def update_game(game_state, sound_manager=None):
                     ball.on_ground = False
                     ball.throw_start_pos = {'x': ball.x, 'y': ball.y}
                     ball.grab_time = now  # Simpan waktu grab
+                    # Reset sisa kecepatan menggelinding dan riwayat dari pegangan sebelumnya
+                    ball.vx = 0
+                    ball.vy = 0
+                    ball.prev_x = None
+                    ball.prev_y = None
+                    ball.prev_positions.clear()
                     break
     
     # 3. Throw Mechanics (Melempar bola) - DITINGKATKAN
@@ -72,11 +87,17 @@ def update_game(game_state, sound_manager=None):
         hold_duration = now - ball.grab_time if hasattr(ball, 'grab_time') else 999
         
         if hold_duration > 0.2:  # Hanya lempar jika sudah dipegang cukup lama
-            # Menghitung kecepatan lempar berdasarkan pergerakan terakhir
-            if ball.prev_x is not None:
-                # Kecepatan lempar DITINGKATKAN untuk lebih responsif
-                ball.vx = (ball.x - ball.prev_x) * 4.5  # Ditingkatkan dari 3 ke 4.5
-                ball.vy = (ball.y - ball.prev_y) * 4.5 - 0.04  # Ditingkatkan dari 3 ke 4.5, boost awal dari -0.03 ke -0.04
+            # Menghitung kecepatan lempar dari riwayat posisi tangan (~100 ms terakhir)
+            # sehingga lemparan sama kuatnya di 15 maupun 60 FPS
+            if len(ball.prev_positions) >= 2:
+                vx, vy = ball.prev_positions.velocity(THROW_VELOCITY_WINDOW)
+                # Konversi unit/detik ke unit/frame pada FPS acuan
+                ball.vx = vx / THROW_REFERENCE_FPS * THROW_GAIN
+                ball.vy = vy / THROW_REFERENCE_FPS * THROW_GAIN - 0.04  # Boost awal ke atas
+            elif ball.prev_x is not None:
+                # Tangan hanya terdeteksi satu frame: pakai selisih satu frame seperti sebelumnya
+                ball.vx = (ball.x - ball.prev_x) * THROW_GAIN
+                ball.vy = (ball.y - ball.prev_y) * THROW_GAIN - 0.04
             
             ball.thrown = True
             ball.grabbed = False
@@ -92,6 +113,9 @@ def update_game(game_state, sound_manager=None):
         target_x = game_state.middle_finger_tip['x']
         target_y = game_state.middle_finger_tip['y']
         
+        # Simpan posisi tangan mentah (tanpa smoothing) untuk estimasi kecepatan lempar
+        ball.prev_positions.append(frame_time, target_x, target_y)
+        
         # Interpolasi lebih halus (0.3 = 30% ke target, 70% posisi lama)
         ball.x = ball.x * 0.3 + target_x * 0.7
         ball.y = ball.y * 0.3 + target_y * 0.7
@@ -147,7 +171,7 @@ def update_game(game_state, sound_manager=None):
             if inside_ring and ball.thrown:
                 if not was_inside_ring:
                     if now - game_state.last_score_time > 0.3:
-                        _handle_score(game_state, ball, now, sound_manager) 
+                        _handle_score(game_state, ball, now, sound_manager, replay_buffer)
                 ball.entered_from_top = True
             else:
                 ball.entered_from_top = False
@@ -163,7 +187,7 @@ def update_game(game_state, sound_manager=None):
         if game_state.time_left <= 0:
             end_game(game_state, sound_manager)
 
-def _handle_score(game_state, ball, now, sound_manager=None):
+def _handle_score(game_state, ball, now, sound_manager=None, replay_buffer=None):
     """Helper function internal untuk memproses penambahan poin."""
     points = 2
     throw_x = 0
@@ -185,6 +209,10 @@ def _handle_score(game_state, ball, now, sound_manager=None):
     if sound_manager:
         sound_manager.play('score')
     
+    # Simpan klip instant replay (ditulis di thread latar belakang)
+    if replay_buffer:
+        replay_buffer.save_clip(tag=f"{points}pt")
+    
     print(f"🏀 SCORE! +{points} poin! Total: {game_state.score}")
 
 def end_game(game_state, sound_manager=None):
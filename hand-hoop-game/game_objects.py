@@ -1,5 +1,63 @@
 import random
 import time
+import numpy as np
+
+class PositionHistory:
+    """
+    Ring buffer berkapasitas tetap untuk posisi tangan (t, x, y) selama bola dipegang.
+    Dipakai untuk mengestimasi kecepatan lemparan secara independen dari frame rate.
+    """
+    def __init__(self, capacity=32):
+        self.capacity = capacity
+        self.samples = np.zeros((capacity, 3), dtype=np.float64)  # Kolom: t, x, y
+        self.index = 0  # Slot yang akan ditulis berikutnya
+        self.count = 0
+
+    def clear(self):
+        self.index = 0
+        self.count = 0
+
+    def append(self, t, x, y):
+        # Jam sumber mundur (mis. proses capture di-restart): riwayat lama tidak bisa dipakai
+        if self.count and t <= self.samples[self.index - 1, 0]:
+            self.clear()
+        self.samples[self.index] = (t, x, y)
+        self.index = (self.index + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def __len__(self):
+        return self.count
+
+    def ordered(self):
+        """Mengembalikan sampel terurut dari yang paling lama ke paling baru."""
+        if self.count < self.capacity:
+            return self.samples[:self.count]
+        return np.roll(self.samples, -self.index, axis=0)
+
+    def velocity(self, window=0.1):
+        """
+        Mengestimasi kecepatan (unit/detik) dengan fit garis least-squares
+        terhadap sampel dalam `window` detik terakhir.
+        Mengembalikan (0.0, 0.0) jika sampel kurang dari dua.
+        """
+        samples = self.ordered()
+        if len(samples) < 2:
+            return 0.0, 0.0
+
+        recent = samples[samples[:, 0] >= samples[-1, 0] - window]
+        # Jika frame rate sangat rendah, minimal pakai dua sampel terakhir
+        if len(recent) < 2:
+            recent = samples[-2:]
+
+        t = recent[:, 0] - recent[:, 0].mean()
+        denom = np.dot(t, t)
+        if denom <= 0:
+            return 0.0, 0.0
+
+        # Slope least-squares untuk x dan y sekaligus
+        xy = recent[:, 1:] - recent[:, 1:].mean(axis=0)
+        vx, vy = (t @ xy) / denom
+        return float(vx), float(vy)
 
 class Ball:
     """
@@ -23,7 +81,7 @@ class Ball:
         # Tracking Physics
         self.prev_x = None
         self.prev_y = None
-        self.prev_positions = []  
+        self.prev_positions = PositionHistory()  # Riwayat posisi tangan untuk estimasi lemparan
         self.throw_start_pos = None  # Posisi saat lemparan dimulai
         
         # Scoring Logic Flags
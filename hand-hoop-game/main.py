@@ -6,25 +6,22 @@ from game_objects import GameState
 from utils import is_hand_closed
 from sound_manager import SoundManager
 import os
+import time
+import argparse
+from output_sink import create_sinks, submit_frame, close_sinks, is_supported_video_path
 
-def main():
-    """ Fungsi utama untuk inisialisasi kamera, MediaPipe, dan menjalankan Game Loop. """
-    # 1. Setup MediaPipe
+def create_hands():
+    """Membuat detektor MediaPipe Hands dengan konfigurasi game."""
     mp_hands = mp.solutions.hands
-    hands = mp_hands.Hands(
+    return mp_hands.Hands(
         max_num_hands=1,
         model_complexity=1,
         min_detection_confidence=0.5,
         min_tracking_confidence=0.5
     )
-    
-    # 2. Setup Kamera
-    cap = cv2.VideoCapture(0)
-    cap.set(cv2.CAP_PROP_FRAME_WIDTH, 1280)
-    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 720)
-    
-    # 5. SETUP AUDIO 
-    sound_mgr = SoundManager()
+
+def load_sounds(sound_mgr):
+    """Memuat semua efek suara dari folder assets."""
     # Pastikan Ada file suara .wav di folder yang sama atau folder assets
     # path suara:
     BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -33,6 +30,89 @@ def main():
     sound_mgr.load_sound('score', os.path.join(ASSET_DIR, 'goalSound.wav'))
     sound_mgr.load_sound('win',   os.path.join(ASSET_DIR, 'win.wav'))
     sound_mgr.load_sound('lose',  os.path.join(ASSET_DIR, 'lose.wav'))
+
+def process_frame(frame, hands, game_state, sound_mgr=None, replay_buffer=None, capture_time=None):
+    """
+    Memproses satu frame kamera: deteksi tangan, update logika, dan render.
+    Mengembalikan frame yang sudah digambar (dipakai juga oleh server.py).
+    """
+    # Mirror frame
+    frame = cv2.flip(frame, 1)
+    height, width, _ = frame.shape
+    
+    # Deteksi Tangan
+    rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    results = hands.process(rgb_frame)
+    
+    # Update data tangan ke GameState
+    if results.multi_hand_landmarks:
+        for hand_landmarks in results.multi_hand_landmarks:
+            # Ambil posisi ujung jari tengah (untuk grabbing)
+            middle_tip = hand_landmarks.landmark[12]
+            game_state.middle_finger_tip = {
+                'x': middle_tip.x, 'y': middle_tip.y, 'z': middle_tip.z
+            }
+            
+            palm = hand_landmarks.landmark[0]
+            game_state.palm_center = {'x': palm.x, 'y': palm.y}
+            
+            # Deteksi kepalan
+            game_state.is_closed_hand = is_hand_closed(hand_landmarks)
+            
+            # Gambar tangan
+            # Bagian ini dicomment agar tidak menggambarkan landmark tangan
+            # viz.draw_hand_landmarks(frame, hand_landmarks, width, height, game_state.is_closed_hand)
+    else:
+        game_state.middle_finger_tip = None
+        game_state.is_closed_hand = False
+    
+    # Update Logika Game (hanya jika sedang main dan tidak freeze frame score)
+    if game_state.is_playing:
+        if not game_state.score_effect_active:
+            # PASS sound_mgr dan replay_buffer ke fungsi update_game
+            logic.update_game(game_state, sound_manager=sound_mgr, replay_buffer=replay_buffer,
+                              frame_time=capture_time)
+        
+        # Render Elemen Game
+        # Ground
+        ground_y = int(game_state.ground * height)
+        cv2.line(frame, (0, ground_y), (width, ground_y), (255, 255, 255), 2)
+        
+        viz.draw_scoring_zones(frame, game_state, width, height)
+        viz.draw_hoop(frame, game_state.hoop, width, height, game_state.debug_mode)
+        
+        for ball in game_state.balls:
+            viz.draw_ball(frame, ball, width, height, game_state)
+            
+        viz.draw_ui(frame, game_state, width, height)
+        
+        # Capture freeze frame untuk efek skor
+        if game_state.score_effect_active and game_state.freeze_frame is None:
+            game_state.freeze_frame = frame.copy()
+        
+        viz.draw_score_effect(frame, game_state, width, height)
+    
+    # Render Layar Menu
+    if game_state.show_start_screen:
+        viz.draw_start_screen(frame, width, height)
+    elif game_state.show_game_over:
+        viz.draw_game_over_screen(frame, width, height, game_state)
+    
+    return frame
+
+def main(record_path=None, stream_port=None, replay_dir=None, stream_host='127.0.0.1'):
+    """ Fungsi utama untuk inisialisasi kamera, MediaPipe, dan menjalankan Game Loop. """
+    # 1. Setup MediaPipe
+    hands = create_hands()
+    
+    # 2. Setup Kamera
+    cap = cv2.VideoCapture(0)
+    cap.set(cv2.CAP_PROP_FRAME_WIDTH, 1280)
+    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 720)
+    
+    # 5. SETUP AUDIO 
+    sound_mgr = SoundManager()
+    load_sounds(sound_mgr)
     
     # 4. Inisialisasi Game State
     game_state = GameState()
@@ -43,72 +123,21 @@ def main():
     print("Tekan SPASI untuk mulai/restart")
     print("Tekan Q untuk keluar")
     
+    sinks = []
     try:
+        # 6. Output Sink (rekaman, stream penonton, instant replay)
+        sinks, replay_buffer = create_sinks(record_path, stream_port, replay_dir, stream_host=stream_host)
+        
         while cap.isOpened():
             ret, frame = cap.read()
+            capture_time = time.time()  # Waktu frame diambil, sebelum inferensi
             if not ret:
                 break
             
-            # Mirror frame
-            frame = cv2.flip(frame, 1)
-            height, width, _ = frame.shape
-            
-            # Deteksi Tangan
-            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            results = hands.process(rgb_frame)
-            
-            # Update data tangan ke GameState
-            if results.multi_hand_landmarks:
-                for hand_landmarks in results.multi_hand_landmarks:
-                    # Ambil posisi ujung jari tengah (untuk grabbing)
-                    middle_tip = hand_landmarks.landmark[12]
-                    game_state.middle_finger_tip = {
-                        'x': middle_tip.x, 'y': middle_tip.y, 'z': middle_tip.z
-                    }
-                    
-                    palm = hand_landmarks.landmark[0]
-                    game_state.palm_center = {'x': palm.x, 'y': palm.y}
-                    
-                    # Deteksi kepalan
-                    game_state.is_closed_hand = is_hand_closed(hand_landmarks)
-                    
-                    # Gambar tangan
-                    # Bagian ini dicomment agar tidak menggambarkan landmark tangan
-                    # viz.draw_hand_landmarks(frame, hand_landmarks, width, height, game_state.is_closed_hand)
-            else:
-                game_state.middle_finger_tip = None
-                game_state.is_closed_hand = False
-            
-            # Update Logika Game (hanya jika sedang main dan tidak freeze frame score)
-            if game_state.is_playing:
-                if not game_state.score_effect_active:
-                    # PASS sound_mgr ke fungsi update_game
-                    logic.update_game(game_state, sound_manager=sound_mgr)
-                
-                # Render Elemen Game
-                # Ground
-                ground_y = int(game_state.ground * height)
-                cv2.line(frame, (0, ground_y), (width, ground_y), (255, 255, 255), 2)
-                
-                viz.draw_scoring_zones(frame, game_state, width, height)
-                viz.draw_hoop(frame, game_state.hoop, width, height, game_state.debug_mode)
-                
-                for ball in game_state.balls:
-                    viz.draw_ball(frame, ball, width, height, game_state)
-                    
-                viz.draw_ui(frame, game_state, width, height)
-                
-                # Capture freeze frame untuk efek skor
-                if game_state.score_effect_active and game_state.freeze_frame is None:
-                    game_state.freeze_frame = frame.copy()
-                
-                viz.draw_score_effect(frame, game_state, width, height)
+            frame = process_frame(frame, hands, game_state, sound_mgr, replay_buffer, capture_time)
             
-            # Render Layar Menu
-            if game_state.show_start_screen:
-                viz.draw_start_screen(frame, width, height)
-            elif game_state.show_game_over:
-                viz.draw_game_over_screen(frame, width, height, game_state)
+            # Frame diserahkan tanpa disalin; frame ini tidak diubah lagi setelahnya
+            submit_frame(sinks, frame)
             
             cv2.imshow('Hand Hoop Challenge', frame)
             
@@ -124,6 +153,17 @@ def main():
         cap.release()
         cv2.destroyAllWindows()
         sound_mgr.cleanup()
+        close_sinks(sinks)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Hand Hoop Challenge")
+    parser.add_argument('--record', metavar='PATH', help="Rekam gameplay ke file video (.mp4/.avi)")
+    parser.add_argument('--stream', metavar='PORT', type=int, help="Sajikan stream MJPEG di port ini")
+    parser.add_argument('--stream-host', metavar='HOST', default='127.0.0.1',
+                        help="Alamat bind stream (default hanya lokal, 0.0.0.0 untuk LAN)")
+    parser.add_argument('--replay-dir', metavar='DIR', help="Simpan klip instant replay setiap skor")
+    args = parser.parse_args()
+    if args.record and not is_supported_video_path(args.record):
+        parser.error(f"--record harus berekstensi .mp4 atau .avi: {args.record}")
+    main(record_path=args.record, stream_port=args.stream, replay_dir=args.replay_dir,
+         stream_host=args.stream_host)
\ No newline at end of file
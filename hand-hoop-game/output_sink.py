@@ -0,0 +1,326 @@
+import collections
+import os
+import queue
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import cv2
+
+# Konfigurasi Output
+SINK_QUEUE_SIZE = 4        # Jumlah frame maksimal yang antre per sink
+JPEG_QUALITY = 80
+STREAM_MAX_FPS = 15        # Batas FPS encoding untuk stream penonton
+STREAM_HOST = '127.0.0.1'  # Default hanya lokal; pakai 0.0.0.0 untuk membuka ke LAN
+REPLAY_SECONDS = 5.0       # Panjang rekaman sebelum skor
+REPLAY_POST_ROLL = 1.0     # Rekaman tambahan setelah skor (efek +POINTS ikut terekam)
+
+
+VIDEO_CODECS = {'.mp4': 'mp4v', '.avi': 'MJPG'}  # Ekstensi file rekaman yang didukung
+
+
+def is_supported_video_path(path):
+    return os.path.splitext(path)[1].lower() in VIDEO_CODECS
+
+
+def fourcc_for_path(path):
+    """Memilih codec berdasarkan ekstensi file (.mp4 = mp4v, .avi = MJPEG)."""
+    return cv2.VideoWriter_fourcc(*VIDEO_CODECS[os.path.splitext(path)[1].lower()])
+
+
+class FrameResampler:
+    """
+    Menulis frame ber-timestamp ke VideoWriter dengan FPS tetap.
+    Frame diduplikasi/dilewati sesuai timestamp agar kecepatan putar sama dengan aslinya.
+    """
+    def __init__(self, path, fps):
+        self.path = path
+        self.fps = fps
+        self.writer = None
+        self.start_time = None
+        self.written = 0
+        self.failed = False
+
+    def write(self, timestamp, frame):
+        if self.failed:
+            return
+
+        # Writer dibuka saat frame pertama datang karena ukuran frame baru diketahui
+        if self.writer is None:
+            height, width = frame.shape[:2]
+            self.writer = cv2.VideoWriter(self.path, fourcc_for_path(self.path), self.fps, (width, height))
+            if not self.writer.isOpened():
+                # Encoder tidak tersedia atau path tidak bisa ditulis: frame berikutnya dibuang
+                print(f"❌ Gagal membuka file video: {self.path}")
+                self.failed = True
+                return
+            self.start_time = timestamp
+
+        target = int((timestamp - self.start_time) * self.fps) + 1
+        while self.written < target:
+            self.writer.write(frame)
+            self.written += 1
+
+    def release(self):
+        """Menutup file video; mengembalikan False jika gagal atau belum ada frame yang ditulis."""
+        if self.writer is None:
+            return False
+        self.writer.release()
+        return not self.failed
+
+
+class OutputSink:
+    """
+    Dasar semua sink: antrean berukuran tetap dan thread latar belakang.
+    `submit()` tidak pernah memblokir game loop; jika antrean penuh, frame
+    tertua dibuang. Frame diserahkan tanpa disalin, jadi pemanggil tidak
+    boleh mengubah array frame setelah di-submit.
+    """
+    def __init__(self, name, max_queue=SINK_QUEUE_SIZE):
+        self.name = name
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.dropped = 0
+        self.thread = threading.Thread(target=self._run, name=f'sink-{name}', daemon=True)
+        self.thread.start()
+
+    def submit(self, frame, timestamp=None):
+        """Menyerahkan frame yang sudah dirender ke sink (non-blocking)."""
+        item = (timestamp if timestamp is not None else time.time(), frame)
+        try:
+            self.queue.put_nowait(item)
+        except queue.Full:
+            # Buang frame tertua agar sink selalu mendapat frame terbaru
+            try:
+                self.queue.get_nowait()
+            except queue.Empty:
+                pass
+            self.dropped += 1
+            try:
+                self.queue.put_nowait(item)
+            except queue.Full:
+                pass
+
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+            try:
+                self.handle(*item)
+            except Exception as e:
+                print(f"❌ Sink {self.name} gagal memproses frame: {e}")
+
+    def handle(self, timestamp, frame):
+        raise NotImplementedError
+
+    def finish(self):
+        """Dipanggil di thread pemanggil setelah thread sink berhenti."""
+
+    def close(self):
+        """Menghentikan thread sink setelah semua frame yang antre diproses."""
+        self.queue.put(None)
+        self.thread.join()
+        self.finish()
+        if self.dropped:
+            print(f"⚠️ Sink {self.name}: {self.dropped} frame dibuang")
+
+
+class VideoFileSink(OutputSink):
+    """Merekam gameplay ke file video (.mp4 atau .avi MJPEG)."""
+    def __init__(self, path, fps=30):
+        if not is_supported_video_path(path):
+            raise ValueError(f"Format rekaman tidak didukung: {path} (gunakan .mp4 atau .avi)")
+        self.path = path
+        self.resampler = FrameResampler(path, fps)
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        super().__init__(f'video:{os.path.basename(path)}')
+
+    def handle(self, timestamp, frame):
+        # Resampling ke FPS tetap agar durasi video sesuai waktu nyata
+        self.resampler.write(timestamp, frame)
+
+    def finish(self):
+        if self.resampler.release():
+            print(f"🎬 Rekaman disimpan: {self.path}")
+
+
+class MJPEGStreamSink(OutputSink):
+    """Menyajikan stream MJPEG lewat HTTP lokal untuk layar penonton."""
+    def __init__(self, port=8080, host=STREAM_HOST, quality=JPEG_QUALITY, max_fps=STREAM_MAX_FPS):
+        self.quality = quality
+        self.min_interval = 1.0 / max_fps if max_fps else 0
+        self.last_encode_time = 0
+        self.latest_jpeg = None
+        self.frame_id = 0
+        self.condition = threading.Condition()
+        self.closed = False
+
+        sink = self
+
+        class StreamHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                self.send_response(200)
+                self.send_header('Content-Type', 'multipart/x-mixed-replace; boundary=frame')
+                self.send_header('Cache-Control', 'no-cache')
+                self.end_headers()
+                last_id = 0
+                try:
+                    while True:
+                        jpeg, last_id = sink.wait_for_frame(last_id)
+                        if jpeg is None:
+                            break
+                        self.wfile.write(b'--frame\r\nContent-Type: image/jpeg\r\n')
+                        self.wfile.write(f'Content-Length: {len(jpeg)}\r\n\r\n'.encode())
+                        self.wfile.write(jpeg)
+                        self.wfile.write(b'\r\n')
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), StreamHandler)
+        self.server.daemon_threads = True
+        self.server_thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.server_thread.start()
+        print(f"📡 Stream MJPEG: http://{host}:{self.server.server_address[1]}/")
+        super().__init__(f'stream:{port}', max_queue=1)
+
+    def handle(self, timestamp, frame):
+        # Batasi FPS encoding agar CPU tidak habis untuk stream
+        if timestamp - self.last_encode_time < self.min_interval:
+            return
+        self.last_encode_time = timestamp
+
+        ok, jpeg = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+        if not ok:
+            return
+        with self.condition:
+            self.latest_jpeg = jpeg.tobytes()
+            self.frame_id += 1
+            self.condition.notify_all()
+
+    def wait_for_frame(self, last_id, timeout=1.0):
+        """Menunggu frame JPEG yang lebih baru dari `last_id` (dipakai tiap klien HTTP)."""
+        with self.condition:
+            while self.frame_id == last_id and not self.closed:
+                self.condition.wait(timeout)
+            if self.closed:
+                return None, last_id
+            return self.latest_jpeg, self.frame_id
+
+    def finish(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class ReplayBuffer(OutputSink):
+    """
+    Ring buffer beberapa detik terakhir (disimpan sebagai JPEG agar hemat memori).
+    `save_clip()` dipanggil saat skor; klip ditulis setelah post-roll selesai
+    di thread terpisah sehingga game loop tidak pernah menunggu.
+    """
+    def __init__(self, output_dir, seconds=REPLAY_SECONDS, post_roll=REPLAY_POST_ROLL,
+                 fps=30, quality=JPEG_QUALITY):
+        self.output_dir = output_dir
+        self.seconds = seconds
+        self.post_roll = post_roll
+        self.fps = fps
+        self.quality = quality
+        self.frames = collections.deque()
+        self.pending = []  # (deadline, path) klip yang menunggu post-roll
+        self.pending_lock = threading.Lock()
+        self.writers = []
+        os.makedirs(output_dir, exist_ok=True)
+        super().__init__(f'replay:{os.path.basename(output_dir)}')
+
+    def save_clip(self, tag=''):
+        """Meminta klip replay (aman dipanggil dari game loop, tidak memblokir)."""
+        now = time.time()
+        suffix = f"_{tag}" if tag else ""
+        name = time.strftime('replay_%Y%m%d_%H%M%S', time.localtime(now)) + f"_{int(now * 1000) % 1000:03d}{suffix}.mp4"
+        with self.pending_lock:
+            self.pending.append((now + self.post_roll, os.path.join(self.output_dir, name)))
+
+    def handle(self, timestamp, frame):
+        ok, jpeg = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+        if ok:
+            self.frames.append((timestamp, jpeg))
+
+        # Buang frame yang sudah di luar jendela replay
+        while self.frames and self.frames[0][0] < timestamp - self.seconds - self.post_roll:
+            self.frames.popleft()
+
+        self._flush_pending(timestamp)
+
+    def _flush_pending(self, now):
+        with self.pending_lock:
+            ready = [clip for clip in self.pending if clip[0] <= now]
+            self.pending = [clip for clip in self.pending if clip[0] > now]
+
+        for deadline, path in ready:
+            start = deadline - self.post_roll - self.seconds
+            clip = [(t, jpeg) for t, jpeg in self.frames if start <= t <= deadline]
+            if not clip:
+                continue
+            writer = threading.Thread(target=self._write_clip, args=(path, clip), daemon=True)
+            writer.start()
+            self.writers.append(writer)
+        self.writers = [w for w in self.writers if w.is_alive()]
+
+    def _write_clip(self, path, clip):
+        resampler = FrameResampler(path, self.fps)
+        saved = False
+        try:
+            for t, jpeg in clip:
+                resampler.write(t, cv2.imdecode(jpeg, cv2.IMREAD_COLOR))
+                if resampler.failed:
+                    break
+        finally:
+            saved = resampler.release()
+        if saved:
+            print(f"🎞️ Replay disimpan: {path}")
+
+    def finish(self):
+        # Klip yang post-roll-nya belum selesai tetap disimpan dengan frame yang ada
+        self._flush_pending(float('inf'))
+        for writer in self.writers:
+            writer.join()
+
+
+def submit_frame(sinks, frame):
+    """Menyerahkan satu frame yang sama ke semua sink."""
+    timestamp = time.time()
+    for sink in sinks:
+        sink.submit(frame, timestamp)
+
+
+def close_sinks(sinks):
+    for sink in sinks:
+        sink.close()
+
+
+def create_sinks(record_path=None, stream_port=None, replay_dir=None, fps=30, stream_host=STREAM_HOST):
+    """
+    Membuat daftar sink dari opsi command line.
+    Mengembalikan (sinks, replay_buffer); replay_buffer None jika tidak dipakai.
+    Jika salah satu sink gagal dibuat (mis. port sudah dipakai), sink yang
+    sudah berjalan ditutup dulu sebelum error diteruskan.
+    """
+    sinks = []
+    replay_buffer = None
+    try:
+        if record_path:
+            sinks.append(VideoFileSink(record_path, fps=fps))
+        if stream_port is not None:
+            sinks.append(MJPEGStreamSink(port=stream_port, host=stream_host))
+        if replay_dir:
+            replay_buffer = ReplayBuffer(replay_dir, fps=fps)
+            sinks.append(replay_buffer)
+    except Exception:
+        close_sinks(sinks)
+        raise
+    return sinks, replay_buffer
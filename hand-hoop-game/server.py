@@ -0,0 +1,459 @@
+import argparse
+import multiprocessing
+import os
+import time
+from multiprocessing import shared_memory
+
+import cv2
+import numpy as np
+
+import game_logic as logic
+from game_objects import GameState
+from output_sink import create_sinks, submit_frame, close_sinks
+from sound_manager import SoundManager
+
+# Konfigurasi Server
+FRAME_WIDTH = 1280
+FRAME_HEIGHT = 720
+POLL_INTERVAL = 0.5        # Interval supervisor mengecek sesi (detik)
+STATS_INTERVAL = 5.0       # Interval cetak statistik FPS (detik)
+HEARTBEAT_TIMEOUT = 10.0   # Worker dianggap hang jika tidak memproses frame selama ini
+STARTUP_TIMEOUT = HEARTBEAT_TIMEOUT * 3  # Batas waktu memuat model/suara/sink sampai frame pertama
+MAX_RESTART_DELAY = 30.0   # Batas atas jeda restart (backoff eksponensial)
+AUTO_RESTART_DELAY = 5.0   # Jeda sebelum game dimulai ulang otomatis setelah game over
+HEALTHY_INTERVAL = 60.0    # Worker sehat selama ini -> hitungan restart direset
+SINK_FLUSH_TIMEOUT = 30.0  # Waktu tunggu worker menutup rekaman/replay sebelum dipaksa berhenti
+
+
+class SharedFrameBuffer:
+    """
+    Double buffer frame di shared memory antara proses capture dan worker.
+    Writer selalu menulis ke slot yang tidak aktif lalu menukar slot di bawah lock,
+    sehingga reader tidak pernah membaca frame yang setengah tertulis.
+    """
+    def __init__(self, shape, ctx=multiprocessing):
+        self.shape = tuple(shape)
+        size = int(np.prod(self.shape)) * 2
+        self.shm = shared_memory.SharedMemory(create=True, size=size)
+        self.lock = ctx.Lock()
+        self.seq = ctx.RawValue('Q', 0)  # Nomor frame terakhir, slot aktif = seq % 2
+        self.times = ctx.RawArray('d', 2)  # Waktu capture tiap slot
+        self._attach()
+
+    def _attach(self):
+        self.slots = np.ndarray((2,) + self.shape, dtype=np.uint8, buffer=self.shm.buf)
+
+    def __getstate__(self):
+        # Array numpy tidak ikut di-pickle, cukup nama shared memory-nya
+        state = self.__dict__.copy()
+        del state['slots']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._attach()
+
+    def write(self, frame, capture_time):
+        """Menulis frame ke slot cadangan lalu menjadikannya slot aktif."""
+        slot = (self.seq.value + 1) % 2
+        self.slots[slot] = frame
+        self.times[slot] = capture_time
+        with self.lock:
+            self.seq.value += 1
+
+    def read(self, out, last_seq=0):
+        """
+        Menyalin frame terbaru ke `out` jika lebih baru dari `last_seq`.
+        Mengembalikan (nomor frame, waktu capture), atau None jika belum ada frame baru.
+        """
+        with self.lock:
+            seq = self.seq.value
+            if seq == last_seq:
+                return None
+            out[:] = self.slots[seq % 2]
+            capture_time = self.times[seq % 2]
+        return seq, capture_time
+
+    def close(self, unlink=False):
+        self.slots = None
+        self.shm.close()
+        if unlink:
+            self.shm.unlink()
+
+
+class SessionStats:
+    """Counter di shared memory yang diisi worker dan dibaca supervisor."""
+    def __init__(self, ctx=multiprocessing):
+        self.frames = ctx.RawValue('Q', 0)
+        self.last_seq = ctx.RawValue('Q', 0)
+        self.heartbeat = ctx.RawValue('d', 0.0)
+        self.score = ctx.RawValue('i', 0)
+
+
+def parse_source(source):
+    """Sumber berupa angka dianggap index kamera, selain itu path file video."""
+    return int(source) if str(source).isdigit() else source
+
+
+def run_capture(source, frame_buffer, stop_event, loop_file=True, realtime=True):
+    """Proses capture: membaca frame dari kamera/file dan menulis ke shared memory."""
+    source = parse_source(source)
+    is_file = isinstance(source, str)
+    height, width, _ = frame_buffer.shape
+
+    cap = cv2.VideoCapture(source)
+    if not is_file:
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+    if not cap.isOpened():
+        raise SystemExit(f"❌ Sumber frame tidak bisa dibuka: {source}")
+
+    # File video diputar sesuai FPS aslinya agar perilakunya seperti kamera
+    native_fps = cap.get(cv2.CAP_PROP_FPS) if is_file else 0
+    native_fps = native_fps if native_fps > 0 else 30
+    interval = 1.0 / native_fps if is_file and realtime else 0
+    frame_index = 0  # Dihitung terus walau file diulang, untuk waktu media yang monoton
+    next_frame_time = time.time()
+    rewound = False
+
+    try:
+        while not stop_event.is_set():
+            ret, frame = cap.read()
+            if not ret:
+                if is_file and loop_file and not rewound:
+                    cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                    rewound = True
+                    continue
+                if is_file and not loop_file:
+                    return  # File selesai diputar, sesi berakhir normal
+                raise SystemExit(f"❌ Gagal membaca frame dari: {source}")
+            rewound = False
+
+            # File memakai waktu media agar kekuatan lemparan tidak ikut --max-speed
+            if is_file:
+                capture_time = frame_index / native_fps
+                frame_index += 1
+            else:
+                capture_time = time.time()
+
+            if frame.shape != frame_buffer.shape:
+                frame = cv2.resize(frame, (width, height))
+            frame_buffer.write(frame, capture_time)
+
+            if interval:
+                next_frame_time += interval
+                delay = next_frame_time - time.time()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    next_frame_time = time.time()
+    finally:
+        cap.release()
+
+
+def run_session(session_id, frame_buffer, stats, stop_event, show=False, sound=False, auto_start=True,
+                sink_options=None, audio_device=None):
+    """Proses worker: inferensi MediaPipe, logika game, dan render untuk satu kiosk."""
+    # Satu thread OpenCV per worker agar sesi tidak saling berebut core
+    cv2.setNumThreads(1)
+
+    # Import di sini agar MediaPipe hanya dimuat di proses worker
+    from main import create_hands, load_sounds, process_frame
+
+    hands = create_hands()
+    sound_mgr = SoundManager(enabled=sound, devicename=audio_device)
+    load_sounds(sound_mgr)
+    game_state = GameState()
+
+    # Output sink per kiosk: file rekaman, port stream, dan folder replay sendiri
+    sink_options = sink_options or {}
+    record_path = stream_port = replay_dir = None
+    if sink_options.get('record_dir'):
+        record_name = time.strftime(f'kiosk{session_id}_%Y%m%d_%H%M%S.mp4')
+        record_path = os.path.join(sink_options['record_dir'], record_name)
+    if sink_options.get('stream_port') is not None:
+        stream_port = sink_options['stream_port'] + session_id
+    if sink_options.get('replay_dir'):
+        replay_dir = os.path.join(sink_options['replay_dir'], f'kiosk{session_id}')
+    stream_host = sink_options.get('stream_host', '127.0.0.1')
+
+    frame = np.empty(frame_buffer.shape, dtype=np.uint8)
+    window_name = f'Hand Hoop Challenge - Kiosk {session_id}'
+    game_over_since = None
+    last_seq = 0
+    sinks = []
+
+    try:
+        sinks, replay_buffer = create_sinks(record_path, stream_port, replay_dir, stream_host=stream_host)
+
+        if auto_start:
+            logic.start_game(game_state)
+
+        while not stop_event.is_set():
+            result = frame_buffer.read(frame, last_seq)
+            if result is None:
+                time.sleep(0.002)
+                continue
+            seq, capture_time = result
+            last_seq = seq
+
+            rendered = process_frame(frame, hands, game_state, sound_mgr, replay_buffer, capture_time)
+            submit_frame(sinks, rendered)
+
+            stats.frames.value += 1
+            stats.last_seq.value = seq
+            stats.heartbeat.value = time.time()
+            stats.score.value = game_state.score
+
+            # Kiosk tanpa keyboard: mulai ulang otomatis setelah game over
+            if auto_start and game_state.show_game_over:
+                if game_over_since is None:
+                    game_over_since = time.time()
+                elif time.time() - game_over_since > AUTO_RESTART_DELAY:
+                    logic.start_game(game_state)
+                    game_over_since = None
+
+            if show:
+                cv2.imshow(window_name, rendered)
+                key = cv2.waitKey(1) & 0xFF
+                if key == ord(' '):
+                    if game_state.show_start_screen or game_state.show_game_over:
+                        logic.start_game(game_state)
+                        game_over_since = None
+    finally:
+        hands.close()
+        sound_mgr.cleanup()
+        close_sinks(sinks)
+        frame_buffer.close()
+        if show:
+            cv2.destroyAllWindows()
+
+
+class KioskSession:
+    """Menyimpan konfigurasi, buffer, dan proses milik satu kiosk."""
+    def __init__(self, session_id, source, ctx, shape):
+        self.session_id = session_id
+        self.source = source
+        self.frame_buffer = SharedFrameBuffer(shape, ctx)
+        self.stop_event = ctx.Event()  # Per sesi agar satu kiosk bisa dihentikan dengan rapi
+        self.stats = SessionStats(ctx)
+        self.capture = None
+        self.worker = None
+        self.worker_started_at = 0
+        self.restarts = 0
+        self.next_restart_time = 0
+        self.finished = False
+        self.last_frames = 0
+
+
+class KioskServer:
+    """
+    Supervisor mode server: menjalankan N sesi game di satu host.
+    Tiap sesi punya proses capture dan proses worker sendiri, dan sesi
+    yang crash atau hang akan dijalankan ulang secara otomatis.
+    """
+    def __init__(self, sources, show=False, sound=False, auto_start=True,
+                 loop_file=True, realtime=True, shape=(FRAME_HEIGHT, FRAME_WIDTH, 3), sink_options=None,
+                 audio_devices=None):
+        # Spawn agar perilaku sama di Windows/macOS/Linux dan aman untuk thread MediaPipe
+        self.ctx = multiprocessing.get_context('spawn')
+        self.show = show
+        self.sound = sound
+        self.auto_start = auto_start
+        self.loop_file = loop_file
+        self.realtime = realtime
+        self.sink_options = sink_options
+        # Perangkat audio per kiosk sesuai urutan sumber; kiosk tanpa pasangan memakai default
+        self.audio_devices = audio_devices or []
+        self.sessions = [KioskSession(i, source, self.ctx, shape) for i, source in enumerate(sources)]
+
+    def _start_capture(self, session):
+        session.capture = self.ctx.Process(
+            target=run_capture,
+            args=(session.source, session.frame_buffer, session.stop_event, self.loop_file, self.realtime),
+            name=f'capture-{session.session_id}',
+            daemon=True,
+        )
+        session.capture.start()
+
+    def _audio_device(self, session):
+        if session.session_id < len(self.audio_devices):
+            return self.audio_devices[session.session_id]
+        return None
+
+    def _start_worker(self, session):
+        session.stats.heartbeat.value = 0.0
+        session.worker_started_at = time.time()
+        session.worker = self.ctx.Process(
+            target=run_session,
+            args=(session.session_id, session.frame_buffer, session.stats, session.stop_event,
+                  self.show, self.sound, self.auto_start, self.sink_options,
+                  self._audio_device(session)),
+            name=f'session-{session.session_id}',
+            daemon=True,
+        )
+        session.worker.start()
+
+    def start(self):
+        for session in self.sessions:
+            self._start_capture(session)
+            self._start_worker(session)
+        print(f"🖥️ Server berjalan dengan {len(self.sessions)} sesi kiosk")
+
+    def _is_hung(self, session):
+        """Worker hang: ada frame baru tapi worker tidak memprosesnya dalam waktu lama."""
+        stats = session.stats
+        if stats.heartbeat.value == 0:
+            # Masih memuat model, tapi tidak boleh selamanya (mis. init MediaPipe atau bind port macet)
+            # Hanya dihitung jika capture sudah mengirim frame, agar kamera mati tidak dianggap worker hang
+            has_frames = session.frame_buffer.seq.value > 0
+            return has_frames and time.time() - session.worker_started_at > STARTUP_TIMEOUT
+        has_new_frames = session.frame_buffer.seq.value > stats.last_seq.value
+        return has_new_frames and time.time() - stats.heartbeat.value > HEARTBEAT_TIMEOUT
+
+    def _is_healthy(self, session, now):
+        """Worker sudah memproses frame dan berjalan tanpa masalah cukup lama."""
+        return (session.stats.heartbeat.value > 0
+                and now - session.worker_started_at > HEALTHY_INTERVAL
+                and now - session.stats.heartbeat.value < HEARTBEAT_TIMEOUT)
+
+    def _schedule_restart(self, session, reason):
+        delay = min(MAX_RESTART_DELAY, 2 ** session.restarts)
+        session.restarts += 1
+        session.next_restart_time = time.time() + delay
+        print(f"⚠️ Kiosk {session.session_id}: {reason}, restart dalam {delay:.0f} detik")
+
+    def poll(self):
+        """Mengecek semua sesi dan menjalankan ulang proses yang mati."""
+        now = time.time()
+        for session in self.sessions:
+            if session.finished:
+                continue
+
+            capture, worker = session.capture, session.worker
+
+            # File selesai diputar (exit code 0): sesi selesai, bukan crash.
+            # Worker dihentikan lewat event agar rekaman dan replay sempat ditutup.
+            if capture is not None and not capture.is_alive() and capture.exitcode == 0:
+                session.finished = True
+                session.stop_event.set()
+                print(f"✅ Kiosk {session.session_id}: sumber frame selesai")
+                continue
+
+            # Backoff direset setelah sesi berjalan sehat cukup lama
+            if session.restarts and worker is not None and self._is_healthy(session, now):
+                session.restarts = 0
+
+            # Kumpulkan semua masalah agar restart hanya dihitung sekali per poll
+            problems = []
+            if capture is not None and not capture.is_alive():
+                problems.append(f"capture crash (exit {capture.exitcode})")
+                session.capture = None
+            if worker is not None and not worker.is_alive():
+                problems.append(f"worker crash (exit {worker.exitcode})")
+                session.worker = None
+            elif worker is not None and self._is_hung(session):
+                worker.terminate()
+                worker.join(1)
+                problems.append("worker hang")
+                session.worker = None
+            if problems:
+                self._schedule_restart(session, ", ".join(problems))
+
+            if now >= session.next_restart_time:
+                if session.capture is None:
+                    self._start_capture(session)
+                if session.worker is None:
+                    self._start_worker(session)
+
+    def print_stats(self, elapsed):
+        for session in self.sessions:
+            frames = session.stats.frames.value
+            fps = (frames - session.last_frames) / elapsed if elapsed > 0 else 0
+            session.last_frames = frames
+            status = "selesai" if session.finished else f"{fps:5.1f} FPS"
+            print(f"  Kiosk {session.session_id}: {status} | Skor: {session.stats.score.value}"
+                  f" | Restart: {session.restarts}")
+
+    def run(self, duration=None):
+        """Menjalankan supervisor sampai Ctrl+C, durasi habis, atau semua sesi selesai."""
+        self.start()
+        start_time = last_stats = time.time()
+        try:
+            while not all(session.finished for session in self.sessions):
+                if duration is not None and time.time() - start_time > duration:
+                    break
+                time.sleep(POLL_INTERVAL)
+                self.poll()
+
+                now = time.time()
+                if now - last_stats >= STATS_INTERVAL:
+                    self.print_stats(now - last_stats)
+                    last_stats = now
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+    def stop(self):
+        """Menghentikan semua proses dan membersihkan shared memory."""
+        for session in self.sessions:
+            session.stop_event.set()
+
+        # Satu deadline untuk semua proses agar shutdown tidak N x timeout.
+        # Worker diberi waktu menutup sink; terminate hanya untuk yang masih macet.
+        deadline = time.time() + SINK_FLUSH_TIMEOUT
+        processes = [p for session in self.sessions for p in (session.capture, session.worker) if p is not None]
+        for process in processes:
+            process.join(max(0, deadline - time.time()))
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+                process.join(1)
+
+        for session in self.sessions:
+            session.frame_buffer.close(unlink=True)
+        print("🛑 Server dihentikan")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hand Hoop Challenge - mode server multi-kiosk")
+    parser.add_argument('sources', nargs='+',
+                        help="Sumber frame per kiosk: index kamera (0, 1, ...) atau path file video")
+    parser.add_argument('--show', action='store_true', help="Tampilkan jendela tiap kiosk")
+    parser.add_argument('--sound', action='store_true', help="Aktifkan suara di tiap sesi")
+    parser.add_argument('--audio-device', action='append', default=[], metavar='NAME',
+                        help="Perangkat audio untuk kiosk berikutnya (ulangi per kiosk, urut sesuai sumber)")
+    parser.add_argument('--no-auto-start', action='store_true',
+                        help="Tunggu SPASI (butuh --show) alih-alih mulai otomatis")
+    parser.add_argument('--no-loop', action='store_true', help="Jangan ulang file video saat selesai")
+    parser.add_argument('--max-speed', action='store_true',
+                        help="Baca file video secepat mungkin (untuk uji throughput)")
+    parser.add_argument('--record-dir', help="Rekam gameplay tiap kiosk ke folder ini")
+    parser.add_argument('--stream-port', type=int, default=None,
+                        help="Port stream MJPEG kiosk 0 (kiosk berikutnya memakai port +1, +2, ...)")
+    parser.add_argument('--stream-host', default='127.0.0.1',
+                        help="Alamat bind stream (default hanya lokal, 0.0.0.0 untuk LAN)")
+    parser.add_argument('--replay-dir', help="Simpan klip instant replay tiap kiosk ke folder ini")
+    parser.add_argument('--duration', type=float, default=None, help="Hentikan server setelah N detik")
+    args = parser.parse_args()
+
+    server = KioskServer(
+        args.sources,
+        show=args.show,
+        sound=args.sound,
+        auto_start=not args.no_auto_start,
+        loop_file=not args.no_loop,
+        realtime=not args.max_speed,
+        sink_options={
+            'record_dir': args.record_dir,
+            'stream_port': args.stream_port,
+            'stream_host': args.stream_host,
+            'replay_dir': args.replay_dir,
+        },
+        audio_devices=args.audio_device,
+    )
+    server.run(duration=args.duration)
+
+if __name__ == "__main__":
+    main()
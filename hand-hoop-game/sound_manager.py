@@ -2,17 +2,33 @@ import pygame
 import os
 
 class SoundManager:
-    """ Menangani inisialisasi mixer dan pemutaran efek suara (SFX). """
-    def __init__(self):
-        # Inisialisasi mixer pygame (frekuensi, size, channel, buffer)
-        pygame.mixer.init(frequency=44100, size=-16, channels=2, buffer=512)
-        
+    """
+    Menangani inisialisasi mixer dan pemutaran efek suara (SFX).
+    `devicename` memilih perangkat output tertentu (mis. satu speaker per kiosk),
+    None = perangkat default.
+    """
+    def __init__(self, enabled=True, devicename=None):
         # Dictionary untuk menyimpan objek suara
         self.sounds = {}
-        
+
+        self.sound_enabled = False
+
+        if not enabled:
+            return
+
+        try:
+            # Inisialisasi mixer pygame (frekuensi, size, channel, buffer)
+            pygame.mixer.init(frequency=44100, size=-16, channels=2, buffer=512, devicename=devicename)
+        except pygame.error as e:
+            # Mesin tanpa perangkat audio (mis. server kiosk) tetap bisa jalan tanpa suara
+            print(f"⚠️ Audio tidak tersedia, suara dimatikan: {e}")
+            return
+
         self.sound_enabled = True
 
     def load_sound(self, name, file_path):
+        if not self.sound_enabled:
+            return
         try:
             if os.path.exists(file_path):
                 self.sounds[name] = pygame.mixer.Sound(file_path)
@@ -29,4 +45,5 @@ class SoundManager:
 
     def cleanup(self):
         """Membersihkan resource mixer saat keluar game."""
-        pygame.mixer.quit()
\ No newline at end of file
+        if self.sound_enabled:
+            pygame.mixer.quit()